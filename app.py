@@ -6,18 +6,47 @@ warnings.filterwarnings('ignore', category=DeprecationWarning, module='asyncio')
 
 import streamlit as st
 import pandas as pd
+import numpy as np
+from openpyxl import Workbook
 import time
 import os
 from pathlib import Path
 import json
+import io
+import hashlib
+import copy
 import threading
 import queue
 import sys
 import asyncio
+import concurrent.futures
+import random
+import atexit
+
+# Pin the browser bundle location and skip the launcher's housekeeping pass so
+# starting Playwright doesn't rescan installed browsers on every cold start.
+# Combined with the pooled browser/loop, the launcher runs once per process.
+# The default bundle directory differs per OS, so pin to the right one.
+if sys.platform == "win32":
+    _browsers_dir = Path(os.environ.get("LOCALAPPDATA", str(Path.home() / "AppData" / "Local"))) / "ms-playwright"
+elif sys.platform == "darwin":
+    _browsers_dir = Path.home() / "Library" / "Caches" / "ms-playwright"
+else:
+    _browsers_dir = Path.home() / ".cache" / "ms-playwright"
+os.environ.setdefault("PLAYWRIGHT_BROWSERS_PATH", str(_browsers_dir))
+os.environ.setdefault("PLAYWRIGHT_SKIP_BROWSER_GC", "1")
 
 # Try to install Playwright browsers if needed (for Streamlit Cloud)
+# orjson is 2-5x faster than stdlib json on dict-of-dicts configs; fall back
+# to stdlib when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 try:
     from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+    from playwright.async_api import async_playwright, TimeoutError as AsyncPlaywrightTimeoutError
 except ImportError:
     st.error("Playwright not installed. Please install: pip install playwright")
     st.stop()
@@ -33,7 +62,7 @@ def ensure_playwright_browsers():
                 browser_path = p.chromium.executable_path
                 if os.path.exists(browser_path):
                     return True
-            except:
+            except Exception:
                 pass
             
             # Browsers not installed, try to install
@@ -82,6 +111,7 @@ DEFAULT_CONFIG = {
         "output_selector": "[data-message-author-role='assistant']",
         "submit_method": "enter",  # "enter" or "button"
         "submit_button_selector": None,
+        "input_method": "fill",  # standard textarea - one fill call does it all
         "wait_selector": "[data-testid='stop-button']",  # Wait for this to disappear
         "response_wait_time": 15
     },
@@ -91,6 +121,7 @@ DEFAULT_CONFIG = {
         "output_selector": "div.message-content, .font-claude-message, [data-message-id]",
         "submit_method": "enter",
         "submit_button_selector": None,
+        "input_method": "dom",  # contenteditable - direct DOM write
         "wait_selector": "button:has-text('Stop'), .stop-button, [aria-label*='Stop']",  # Wait for this to disappear
         "response_wait_time": 20
     },
@@ -100,53 +131,155 @@ DEFAULT_CONFIG = {
         "output_selector": ".markdown, [class*='markdown'], .model-response-text, [class*='message-content']",
         "submit_method": "button",
         "submit_button_selector": "button[aria-label*='Send'], button[aria-label*='send'], button[data-testid*='send']",
+        "input_method": "dom",  # contenteditable - direct DOM write
         "wait_selector": None,
         "response_wait_time": 20
     }
 }
 
+# Extra fallback selectors per LLM, merged into compound unions once at config
+# load instead of being rebuilt inside the per-question hot path
+EXTRA_INPUT_SELECTORS = {
+    "Gemini": [
+        # For Angular apps, use class selectors without dynamic attributes
+        ".input-area",  # Direct class selector (ignores Angular _ngcontent attributes)
+        "[class*='input-area']",  # Partial class match (works with Angular)
+        "textarea",
+        ".ql-editor",
+        "[contenteditable='true'][role='textbox']",
+        "[contenteditable='true']"
+    ],
+    "Claude": [
+        "div[contenteditable='true']",
+        "[contenteditable='true'][data-placeholder]",
+        "[contenteditable='true']"
+    ]
+}
+
+EXTRA_OUTPUT_SELECTORS = {
+    "Claude": [
+        "div.message-content",
+        ".font-claude-message",
+        "[data-message-id]",
+        "div[class*='message']",
+        "div[class*='Message']"
+    ],
+    "Gemini": [
+        # For Angular apps, use class selectors that ignore dynamic attributes
+        ".markdown",  # Direct class selector (ignores Angular _ngcontent attributes)
+        "[class*='markdown']",  # Partial class match (works with Angular)
+        ".model-response-text",
+        "[class*='model-response']",
+        ".message-content",
+        "[class*='message-content']",
+        "[data-message-type='model']",
+        "div[class*='response']",
+        "div[class*='Response']"
+    ]
+}
+
+EXTRA_BUTTON_SELECTORS = {
+    "Gemini": [
+        "button[aria-label*='Send']",
+        "button[aria-label*='send']",
+        "button[data-testid*='send']",
+        "button:has-text('Send')",
+        "button.send-button"
+    ]
+}
+
+def _selector_union(primary, extras):
+    """Join a configured selector and its fallbacks into one compound selector"""
+    parts = [p for p in [primary, *extras] if p]
+    return ", ".join(parts)
+
+def _compile_selector_unions(config):
+    """Attach precomputed selector unions to every LLM config entry"""
+    for name, site in config.items():
+        if isinstance(site, dict):
+            site["_input_union"] = _selector_union(site.get("input_selector"), EXTRA_INPUT_SELECTORS.get(name, []))
+            site["_output_union"] = _selector_union(site.get("output_selector"), EXTRA_OUTPUT_SELECTORS.get(name, []))
+            site["_button_union"] = _selector_union(site.get("submit_button_selector"), EXTRA_BUTTON_SELECTORS.get(name, []))
+
+# Parsed-config cache so Streamlit reruns don't re-read and re-parse the file
+# on every widget interaction; keyed on the file's mtime + size
+_CONFIG_CACHE = {"key": None, "value": None}
+
+def _parse_config_bytes(raw):
+    """Parse config JSON bytes (orjson when available, mirroring _dump_config_bytes)"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
 def load_config():
-    """Load configuration from file or use defaults"""
-    config = DEFAULT_CONFIG.copy()
-    
+    """Load configuration from file or use defaults (cached until the file changes)"""
+    # Deep copy so merging user values never mutates DEFAULT_CONFIG's entries
+    config = copy.deepcopy(DEFAULT_CONFIG)
+
     if os.path.exists(CONFIG_FILE):
         try:
-            with open(CONFIG_FILE, 'r') as f:
-                user_config = json.load(f)
-                # Merge with defaults
-                for key, value in user_config.items():
-                    if key in config:
-                        # Update existing LLM config
-                        config[key].update(value)
-                    else:
-                        # Add custom LLM config
-                        config[key] = value
-                return config
+            file_stat = os.stat(CONFIG_FILE)
+            cache_key = (file_stat.st_mtime_ns, file_stat.st_size)
+            if _CONFIG_CACHE["key"] == cache_key:
+                # Hand out a copy - callers mutate their config (sidebar
+                # toggles, the LLM editor), and those writes must not leak
+                # into the cached pristine value
+                return copy.deepcopy(_CONFIG_CACHE["value"])
+            user_config = _parse_config_bytes(Path(CONFIG_FILE).read_bytes())
+            # Merge with defaults
+            for key, value in user_config.items():
+                if key in config:
+                    # Update existing LLM config
+                    config[key].update(value)
+                else:
+                    # Add custom LLM config
+                    config[key] = value
+            _compile_selector_unions(config)
+            _CONFIG_CACHE["key"] = cache_key
+            _CONFIG_CACHE["value"] = copy.deepcopy(config)
+            return config
         except Exception as e:
             st.warning(f"Error loading config: {e}. Using defaults.")
+    _compile_selector_unions(config)
     return config
 
+# Per-run knobs the sidebar writes into the loaded config; they steer the
+# current run only and must never be persisted as "modifications"
+RUNTIME_ONLY_KEYS = {"concurrency", "block_assets"}
+
+def _strip_derived_keys(site):
+    """Drop derived underscore keys and runtime-only knobs from a site entry"""
+    if isinstance(site, dict):
+        return {k: v for k, v in site.items() if not k.startswith("_") and k not in RUNTIME_ONLY_KEYS}
+    return site
+
+def _dump_config_bytes(config):
+    """Serialize a config dict to indented JSON bytes (orjson when available)"""
+    if orjson is not None:
+        return orjson.dumps(config, option=orjson.OPT_INDENT_2)
+    return json.dumps(config, indent=2).encode("utf-8")
+
 def save_config(config):
-    """Save configuration to file"""
+    """Save configuration to file (custom LLMs plus modified defaults only)"""
     try:
         # Separate default and custom configs for better organization
         config_to_save = {}
         for key, value in config.items():
+            cleaned = _strip_derived_keys(value)
             if key not in DEFAULT_CONFIG:
                 # Custom LLM - save all
-                config_to_save[key] = value
+                config_to_save[key] = cleaned
             else:
                 # Default LLM - only save if modified
-                if value != DEFAULT_CONFIG[key]:
-                    config_to_save[key] = value
-        
-        # Always save custom LLMs even if they match defaults structure
-        for key, value in config.items():
-            if key not in DEFAULT_CONFIG:
-                config_to_save[key] = value
+                if cleaned != _strip_derived_keys(DEFAULT_CONFIG[key]):
+                    config_to_save[key] = cleaned
         
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(config, f, indent=2)
+        with open(CONFIG_FILE, 'wb') as f:
+            f.write(_dump_config_bytes(config_to_save))
+        # Invalidate the parsed-config cache explicitly rather than relying on
+        # mtime granularity to notice the write
+        _CONFIG_CACHE["key"] = None
+        _CONFIG_CACHE["value"] = None
         return True
     except Exception as e:
         st.error(f"Error saving config: {e}")
@@ -175,29 +308,71 @@ def wait_for_response(page, config, question_num, total_questions):
     time.sleep(2)
 
 async def wait_for_response_async(page, config, question_num, total_questions):
-    """Wait for LLM response to complete (async version)"""
-    import asyncio
-    from playwright.async_api import TimeoutError as AsyncPlaywrightTimeoutError
-    
+    """Wait for LLM response to complete (async version)
+
+    Watches the response area with a MutationObserver and returns as soon as
+    its text has stopped changing for a settle window, instead of polling the
+    stop button and padding with fixed sleeps afterwards.
+    """
     wait_time = config.get("response_wait_time", 15)
     wait_selector = config.get("wait_selector")
-    
-    # Try to wait for the "stop" button to appear and then disappear
+    output_selector = config.get("output_selector")
+
+    # Install the observer before any waiting so its baseline is the page as
+    # submitted; the settle timer only arms once the text actually changes
+    # from that baseline, so it cannot fire on the previous answer. The
+    # callback re-queries the last matching node because each new answer
+    # arrives in a fresh node - a captured first node never mutates again.
+    try:
+        await page.evaluate(
+            """(sel) => {
+                window.__respDone = new Promise((resolve) => {
+                    const settle = 800;  // ms without text changes = response done
+                    const latest = () => {
+                        const els = document.querySelectorAll(sel);
+                        return els.length ? els[els.length - 1] : document.body;
+                    };
+                    let last = latest().innerText;
+                    let timer = null;
+                    const obs = new MutationObserver(() => {
+                        const t = latest().innerText;
+                        if (t !== last) {
+                            last = t;
+                            clearTimeout(timer);
+                            timer = setTimeout(() => { obs.disconnect(); resolve(true); }, settle);
+                        }
+                    });
+                    obs.observe(document.body, {subtree: true, childList: true, characterData: true});
+                });
+            }""",
+            output_selector
+        )
+        observer_armed = True
+    except Exception:
+        observer_armed = False
+
+    # If the site shows a stop button, give it a moment to appear before
+    # waiting for it to vanish - a bare hidden-wait resolves instantly when
+    # the button simply hasn't rendered yet
     if wait_selector:
         try:
-            # Wait for stop button to appear (response started)
-            await page.wait_for_selector(wait_selector, timeout=5000)
-            # Wait for stop button to disappear (response complete)
+            await page.wait_for_selector(wait_selector, state="visible", timeout=5000)
+        except AsyncPlaywrightTimeoutError:
+            pass
+        try:
             await page.wait_for_selector(wait_selector, state="hidden", timeout=60000)
         except AsyncPlaywrightTimeoutError:
-            # Fallback to fixed wait time
-            await asyncio.sleep(wait_time)
-    else:
-        # Fixed wait time if no wait selector
+            pass
+
+    # Then confirm the response text has actually settled; resolves the
+    # instant the text is stable rather than after a fixed delay
+    try:
+        if not observer_armed:
+            raise asyncio.TimeoutError
+        await asyncio.wait_for(page.evaluate("() => window.__respDone"), timeout=max(wait_time, 60))
+    except (AsyncPlaywrightTimeoutError, asyncio.TimeoutError):
+        # Fallback to the configured fixed wait
         await asyncio.sleep(wait_time)
-    
-    # Additional small delay to ensure content is fully rendered
-    await asyncio.sleep(2)
 
 def get_response_text(page, config, question):
     """Extract response text from the page (sync version - kept for compatibility)"""
@@ -206,15 +381,14 @@ def get_response_text(page, config, question):
     try:
         # Wait for output to appear
         page.wait_for_selector(output_selector, timeout=10000)
-        
-        # Get all matching elements and take the last one (most recent response)
-        elements = page.locator(output_selector).all()
-        if elements:
-            # Get the last element's text
-            response_text = elements[-1].inner_text(timeout=5000)
-            return response_text.strip()
-        else:
-            return "No response found"
+
+        # Query and text extraction fused into a single in-page call - one
+        # protocol round-trip instead of a handle fetch plus a text fetch
+        response_text = page.eval_on_selector_all(
+            output_selector,
+            "els => els.length ? els[els.length - 1].innerText.trim() : ''"
+        )
+        return response_text or "No response found"
     except PlaywrightTimeoutError:
         return "Timeout waiting for response"
     except Exception as e:
@@ -222,58 +396,25 @@ def get_response_text(page, config, question):
 
 async def get_response_text_async(page, config, question):
     """Extract response text from the page (async version)"""
-    from playwright.async_api import TimeoutError as AsyncPlaywrightTimeoutError
-    
-    output_selector = config.get("output_selector")
-    llm_site_name = config.get("_site_name", "")  # Pass site name if available
-    
     try:
-        # Try multiple selectors for better compatibility
-        selectors_to_try = [output_selector]
-        if "Claude" in str(config.get("_site_name", "")):
-            selectors_to_try.extend([
-                "div.message-content",
-                ".font-claude-message",
-                "[data-message-id]",
-                "div[class*='message']",
-                "div[class*='Message']"
-            ])
-        elif "Gemini" in str(config.get("_site_name", "")):
-            # For Angular apps, use class selectors that ignore dynamic attributes
-            selectors_to_try.extend([
-                ".markdown",  # Direct class selector (ignores Angular _ngcontent attributes)
-                "[class*='markdown']",  # Partial class match (works with Angular)
-                ".model-response-text",
-                "[class*='model-response']",
-                ".message-content",
-                "[class*='message-content']",
-                "[data-message-type='model']",
-                "div[class*='response']",
-                "div[class*='Response']"
-            ])
-        
-        # Wait for any output selector to appear
-        element_found = None
-        for selector in selectors_to_try:
-            try:
-                await page.wait_for_selector(selector, timeout=5000)
-                elements = await page.locator(selector).all()
-                if elements:
-                    element_found = elements[-1]  # Get the last (most recent) element
-                    break
-            except:
-                continue
-        
-        if element_found:
-            # Try to get text with multiple methods
-            try:
-                response_text = await element_found.inner_text(timeout=5000)
-            except:
-                # Fallback to text_content if inner_text fails
-                response_text = await element_found.text_content(timeout=5000)
-            
-            if response_text and response_text.strip():
-                return response_text.strip()
+        # Compound selector precomputed at config load; waits for whichever
+        # candidate appears first instead of a sequential timeout per candidate
+        output_union = config.get("_output_union") or config.get("output_selector")
+        response_text = None
+        try:
+            await page.wait_for_selector(output_union, state="attached", timeout=5000)
+            # Query and text extraction fused into a single in-page call - one
+            # protocol round-trip instead of a handle fetch plus a text fetch
+            response_text = await page.eval_on_selector_all(
+                output_union,
+                "els => els.length ? (els[els.length - 1].innerText || els[els.length - 1].textContent || '').trim() : ''"
+            )
+        except AsyncPlaywrightTimeoutError:
+            pass
+
+        if response_text is not None:
+            if response_text:
+                return response_text
             else:
                 return "Response found but empty"
         else:
@@ -285,7 +426,7 @@ async def get_response_text_async(page, config, question):
                 page_text = await page.inner_text("body")
                 if page_text:
                     return f"Extracted page text (may contain UI elements): {page_text[:500]}"
-            except:
+            except AsyncPlaywrightTimeoutError:
                 pass
             return "No response found - selectors may need updating"
     except AsyncPlaywrightTimeoutError:
@@ -293,367 +434,518 @@ async def get_response_text_async(page, config, question):
     except Exception as e:
         return f"Error extracting response: {str(e)}"
 
-def _run_test_thread(questions, config, llm_site_name, headless, results_queue, progress_queue, login_key=None):
-    """Run automated tests in a separate thread with async Playwright (to avoid Streamlit asyncio conflicts)"""
-    import asyncio
-    import sys
-    
-    # Event loop policy is set at module level, no need to set it again here
-    
-    async def run_async_tests():
-        """Async function to run the tests"""
-        from playwright.async_api import async_playwright
-        
+async def set_input_text(page, element, text, input_method="dom"):
+    """Set the input field's text with a single DOM write instead of per-keystroke typing.
+
+    Typing with delay=50 costs 50ms per character plus a CDP round-trip each;
+    one evaluate call writes the whole prompt and fires the input event the
+    frameworks listen for. input_method "fill" is for plain textarea/input
+    targets (ChatGPT), where Playwright's fill already does value-set plus
+    correct event dispatch in one call. Falls back to real typing for sites
+    whose listeners ignore programmatic writes.
+    """
+    if input_method == "fill":
+        await element.fill(text)
+        return
+    try:
+        await element.evaluate(
+            """(el, text) => {
+                el.focus();
+                if (el.tagName === 'TEXTAREA' || el.tagName === 'INPUT') {
+                    el.value = text;
+                    el.dispatchEvent(new Event('input', {bubbles: true}));
+                } else {
+                    el.innerText = text;
+                    el.dispatchEvent(new InputEvent('input', {bubbles: true}));
+                }
+            }""",
+            text
+        )
+    except Exception:
+        # Framework ignored the programmatic write - fall back to real keystrokes
+        await element.click()
+        await page.keyboard.press("Control+A")
+        await page.keyboard.press("Delete")
+        await element.type(text, delay=50)
+
+# Long-lived background asyncio loop shared by all test runs.
+# Creating a fresh thread + event loop per run is expensive and forces the
+# queue-polling dance; instead one daemon thread hosts a single loop and
+# coroutines are submitted with asyncio.run_coroutine_threadsafe.
+# Kept at module level (not st.session_state) so Playwright objects stay
+# attached to one loop for the process lifetime.
+_BG_LOOP = None
+_BG_LOOP_LOCK = threading.Lock()
+
+def _get_background_loop():
+    """Get the shared background event loop, starting its thread on first use"""
+    global _BG_LOOP
+    with _BG_LOOP_LOCK:
+        if _BG_LOOP is None or _BG_LOOP.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="playwright-loop", daemon=True)
+            thread.start()
+            _BG_LOOP = loop
+    return _BG_LOOP
+
+def _stop_background_loop():
+    """Stop the shared loop thread; runs after Playwright teardown has used it"""
+    if _BG_LOOP is not None and not _BG_LOOP.is_closed():
+        _BG_LOOP.call_soon_threadsafe(_BG_LOOP.stop)
+
+# atexit is LIFO, so registering here puts the loop stop after the browser pool
+# and driver shutdown hooks that still need the loop
+atexit.register(_stop_background_loop)
+
+# One Playwright driver (a Node.js subprocess costing ~200-500ms to spawn) is
+# started lazily on the background loop and shared by every run, instead of
+# being spun up and torn down inside each test
+_PLAYWRIGHT_INSTANCE = None
+_PLAYWRIGHT_INIT_LOCK = asyncio.Lock()
+
+async def _get_playwright():
+    """Get the shared Playwright driver, starting it once per process"""
+    global _PLAYWRIGHT_INSTANCE
+    async with _PLAYWRIGHT_INIT_LOCK:
+        if _PLAYWRIGHT_INSTANCE is None:
+            _PLAYWRIGHT_INSTANCE = await async_playwright().start()
+    return _PLAYWRIGHT_INSTANCE
+
+def _shutdown_playwright():
+    """Stop the shared driver on interpreter exit"""
+    if _PLAYWRIGHT_INSTANCE is not None and _BG_LOOP is not None and not _BG_LOOP.is_closed():
         try:
-            progress_queue.put((0, len(questions), "Starting browser..."))
-            progress_queue.put((0, len(questions), f"Headless mode: {headless}"))
-            
-            # Ensure data directory exists
-            try:
-                os.makedirs(USER_DATA_DIR, exist_ok=True)
-                progress_queue.put((0, len(questions), f"Data directory ready: {USER_DATA_DIR}"))
-            except Exception as dir_error:
-                error_msg = f"Failed to create data directory: {str(dir_error)}"
-                progress_queue.put((0, 1, error_msg))
-                results_queue.put(None)
-                return
-            
-            # Initialize Playwright
+            asyncio.run_coroutine_threadsafe(_PLAYWRIGHT_INSTANCE.stop(), _BG_LOOP).result(timeout=5)
+        except Exception:
+            pass
+
+atexit.register(_shutdown_playwright)
+
+MAX_USES_PER_INSTANCE = 50  # Recycle a pooled browser context after this many runs
+
+# Asset types and telemetry hosts that cost load time but contribute nothing
+# to the automation; blocked unless the site config sets "block_assets": False
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+BLOCKED_HOST_FRAGMENTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "segment.io",
+    "sentry.io",
+    "cloudflareinsights.com"
+)
+
+async def _route_blocker(route):
+    """Abort requests for heavy assets and telemetry; let everything else through"""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    elif any(host in request.url for host in BLOCKED_HOST_FRAGMENTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+class BrowserPool:
+    """Pool holding one warmed persistent browser context shared by all sites.
+
+    Launching Chromium and loading the LLM app cost several seconds per run;
+    keeping a warmed context (and its tabs) lets every run after the first
+    skip that cold start. A single context is shared across sites because
+    Chromium holds an exclusive lock on the user-data profile - a second
+    context on the same USER_DATA_DIR fails to launch - so each site gets its
+    own tabs inside the shared context instead. Lives on the background loop,
+    not st.session_state, so the Playwright objects stay on one loop.
+    """
+
+    def __init__(self, max_uses=MAX_USES_PER_INSTANCE):
+        self._entry = None  # [context, uses, headless, block_assets]
+        self._lock = asyncio.Lock()
+        self._max_uses = max_uses
+
+    async def _launch(self, headless, block_assets):
+        """Launch a fresh persistent context (saves login session on disk)"""
+        playwright = await _get_playwright()
+        context = await playwright.chromium.launch_persistent_context(
+            USER_DATA_DIR,
+            headless=headless,
+            viewport={"width": 1920, "height": 1080},
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+        )
+        if block_assets:
+            # Skip images/fonts/media and telemetry - cuts page weight and load
+            # time without affecting the chat UI the automation drives
+            await context.route("**/*", _route_blocker)
+        return context
+
+    async def _close_entry(self):
+        """Close and drop the pooled context (caller holds the lock)"""
+        if self._entry is not None:
             try:
-                progress_queue.put((0, len(questions), "Initializing Playwright..."))
-                async with async_playwright() as p:
-                    progress_queue.put((0, len(questions), "Playwright initialized. Launching browser..."))
-                    
-                    # Launch browser with persistent context (saves login session)
-                    progress_queue.put((0, len(questions), f"Launching browser (headless={headless})..."))
-                    context = await p.chromium.launch_persistent_context(
-                        USER_DATA_DIR,
-                        headless=headless,
-                        slow_mo=500,  # Adds delay to look more human
-                        viewport={"width": 1920, "height": 1080},
-                        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-                    )
-                    progress_queue.put((0, len(questions), "Browser launched successfully!"))
-                    
-                    try:
-                        progress_queue.put((0, len(questions), f"Navigating to {config['url']}..."))
-                        page = await context.new_page()
-                        await page.goto(config["url"], wait_until="networkidle", timeout=30000)
-                        
-                        progress_queue.put((0, len(questions), "Page loaded. Starting questions..."))
-                        
-                        total = len(questions)
-                        results = []
-                        
-                        for idx, question in enumerate(questions, 1):
-                            if not question or pd.isna(question) or str(question).strip() == "":
-                                results.append({
-                                    "Response": "Empty question skipped",
-                                    "Time Taken (seconds)": 0
-                                })
-                                progress_queue.put((idx, total, f"Skipped empty question {idx}"))
-                                continue
-                            
-                            progress_queue.put((idx, total, f"Processing question {idx}/{total}: {question[:50]}..."))
-                            start_time = time.time()
-                            
-                            try:
-                                # Clear and fill input field
-                                input_selector = config["input_selector"]
-                                progress_queue.put((idx, total, f"Waiting for input field ({input_selector})..."))
-                                
-                                # Try multiple selectors if the first one fails (for Gemini/Claude)
-                                input_element = None
-                                selectors_to_try = [input_selector]
-                                if llm_site_name == "Gemini":
-                                    # For Angular apps, use class selectors without dynamic attributes
-                                    selectors_to_try.extend([
-                                        ".input-area",  # Direct class selector (ignores Angular _ngcontent attributes)
-                                        "[class*='input-area']",  # Partial class match (works with Angular)
-                                        "textarea",
-                                        ".ql-editor",
-                                        "[contenteditable='true'][role='textbox']",
-                                        "[contenteditable='true']"
-                                    ])
-                                elif llm_site_name == "Claude":
-                                    selectors_to_try.extend(["div[contenteditable='true']", "[contenteditable='true'][data-placeholder]", "[contenteditable='true']"])
-                                
-                                for selector in selectors_to_try:
-                                    try:
-                                        await page.wait_for_selector(selector, timeout=3000)
-                                        input_element = page.locator(selector).first
-                                        progress_queue.put((idx, total, f"Found input with selector: {selector}"))
-                                        break
-                                    except:
-                                        continue
-                                
-                                if not input_element:
-                                    raise Exception(f"Could not find input field with any selector: {selectors_to_try}")
-                                
-                                # Clear existing content - try different methods
-                                try:
-                                    await input_element.click()
-                                    await asyncio.sleep(0.3)
-                                    await page.keyboard.press("Control+A")
-                                    await asyncio.sleep(0.2)
-                                    await page.keyboard.press("Delete")
-                                except:
-                                    try:
-                                        await input_element.fill("")
-                                    except:
-                                        pass
-                                
-                                await asyncio.sleep(0.5)
-                                
-                                # Type the question - use type for contenteditable divs
-                                progress_queue.put((idx, total, f"Typing question {idx}..."))
-                                question_text = str(question)
-                                
-                                # For contenteditable divs, use type instead of fill
-                                if "contenteditable" in str(selectors_to_try).lower() or llm_site_name in ["Claude", "Gemini"]:
-                                    await input_element.click()
-                                    await asyncio.sleep(0.3)
-                                    await input_element.type(question_text, delay=50)  # Type with delay for contenteditable
-                                else:
-                                    await input_element.fill(question_text)
-                                
-                                await asyncio.sleep(1)
-                                
-                                # Submit the question
-                                progress_queue.put((idx, total, f"Submitting question {idx}..."))
-                                submit_method = config.get("submit_method", "enter")
-                                if submit_method == "button":
-                                    submit_btn = config.get("submit_button_selector")
-                                    if submit_btn:
-                                        # Try multiple button selectors
-                                        button_found = False
-                                        button_selectors = [submit_btn]
-                                        if llm_site_name == "Gemini":
-                                            button_selectors.extend([
-                                                "button[aria-label*='Send']",
-                                                "button[aria-label*='send']",
-                                                "button[data-testid*='send']",
-                                                "button:has-text('Send')",
-                                                "button.send-button"
-                                            ])
-                                        
-                                        for btn_selector in button_selectors:
-                                            try:
-                                                await page.wait_for_selector(btn_selector, timeout=3000, state="visible")
-                                                await page.click(btn_selector)
-                                                button_found = True
-                                                progress_queue.put((idx, total, f"Clicked submit button: {btn_selector}"))
-                                                break
-                                            except:
-                                                continue
-                                        
-                                        if not button_found:
-                                            progress_queue.put((idx, total, "Button not found, trying Enter key..."))
-                                            await page.keyboard.press("Enter")
-                                    else:
-                                        await page.keyboard.press("Enter")
-                                else:
-                                    await page.keyboard.press("Enter")
-                                
-                                # Wait for response
-                                progress_queue.put((idx, total, f"Waiting for response to question {idx}..."))
-                                await wait_for_response_async(page, config, idx, total)
-                                
-                                # Extract response
-                                progress_queue.put((idx, total, f"Extracting response for question {idx}..."))
-                                response_text = await get_response_text_async(page, config, question)
-                                
-                                end_time = time.time()
-                                elapsed = round(end_time - start_time, 2)
-                                
-                                results.append({
-                                    "Response": response_text,
-                                    "Time Taken (seconds)": elapsed
-                                })
-                                
-                                progress_queue.put((idx, total, f"✓ Question {idx}/{total} completed in {elapsed}s"))
-                                
-                            except Exception as e:
-                                end_time = time.time()
-                                elapsed = round(end_time - start_time, 2)
-                                error_msg = f"Error: {str(e)}"
-                                import traceback
-                                error_details = traceback.format_exc()
-                                progress_queue.put((idx, total, f"✗ Question {idx}/{total} failed: {error_msg}"))
-                                progress_queue.put((idx, total, f"Error details: {error_details[:200]}"))
-                                
-                                results.append({
-                                    "Response": error_msg,
-                                    "Time Taken (seconds)": elapsed
-                                })
-                            
-                            await asyncio.sleep(2)  # Small delay between questions
-                        
-                        progress_queue.put((total, total, "Closing browser..."))
-                        await context.close()
-                        results_queue.put(results)
-                        progress_queue.put((total, total, "✓ All questions completed!"))
-                        
-                    except Exception as nav_error:
-                        import traceback
-                        error_details = traceback.format_exc()
-                        error_msg = f"Error during navigation/execution: {str(nav_error)}\nDetails: {error_details[:500]}"
-                        progress_queue.put((0, 1, error_msg))
+                await self._entry[0].close()
+            except Exception:
+                pass
+            self._entry = None
+
+    async def acquire(self, site, headless, block_assets=True):
+        """Return the warmed shared context, launching (or recycling) if needed"""
+        async with self._lock:
+            entry = self._entry
+            # Recycle when launch-time settings changed or the instance is worn out
+            if entry is not None and (entry[2] != headless or entry[3] != block_assets or entry[1] >= self._max_uses):
+                await self._close_entry()
+                entry = None
+            if entry is None:
+                # The old context must be gone before relaunching on the same
+                # profile, and a failed launch must not leave a stale entry
+                await self._close_entry()
+                context = await self._launch(headless, block_assets)
+                entry = [context, 0, headless, block_assets]
+                self._entry = entry
+            entry[1] += 1
+            return entry[0]
+
+    async def discard(self, site):
+        """Close and forget the pooled context (used when a run leaves it in a bad state)"""
+        async with self._lock:
+            await self._close_entry()
+
+    async def close_all(self):
+        """Close the pooled context (interpreter shutdown)"""
+        async with self._lock:
+            await self._close_entry()
+
+_BROWSER_POOL = BrowserPool()
+
+def _shutdown_browser_pool():
+    """Close pooled contexts on exit so profile data is flushed to disk"""
+    if _BG_LOOP is not None and not _BG_LOOP.is_closed():
+        try:
+            asyncio.run_coroutine_threadsafe(_BROWSER_POOL.close_all(), _BG_LOOP).result(timeout=10)
+        except Exception:
+            pass
+
+# Registered after _shutdown_playwright so it runs before it (atexit is LIFO):
+# contexts close first, then the driver stops
+atexit.register(_shutdown_browser_pool)
+
+async def with_retries(coro_factory, attempts=3, base=1.0):
+    """Retry an async action on transient timeouts/network errors with jittered exponential backoff"""
+    for attempt in range(attempts):
+        try:
+            return await coro_factory()
+        except (AsyncPlaywrightTimeoutError, ConnectionError):
+            if attempt == attempts - 1:
+                raise
+            await asyncio.sleep(base * (2 ** attempt) + random.random() * 0.2)
+
+async def _ask_one_question(page, page_lock, semaphore, question, idx, total, config, llm_site_name, progress_queue):
+    """Ask a single question on the given page and return its result dict (one task per question)"""
+    async with semaphore:
+        # Two tasks must never drive the same tab at once
+        async with page_lock:
+            progress_queue.put((idx, total, f"Processing question {idx}/{total}: {str(question)[:50]}..."))
+            start_time = time.time()
+
+            async def attempt():
+                """One try at asking the question on this tab"""
+                # Find the input field via the union precomputed at config load
+                input_union = config.get("_input_union") or config["input_selector"]
+                progress_queue.put((idx, total, f"Waiting for input field ({input_union})..."))
+
+                try:
+                    await page.wait_for_selector(input_union, timeout=5000)
+                    input_element = page.locator(input_union).first
+                    progress_queue.put((idx, total, "Found input field"))
+                except AsyncPlaywrightTimeoutError:
+                    input_element = None
+
+                if not input_element:
+                    raise Exception(f"Could not find input field with selector(s): {input_union}")
+
+                # Wait for the field to actually be interactable instead of sleeping
+                await input_element.wait_for(state="visible", timeout=3000)
+
+                # Write the question in one DOM round-trip (replaces the old
+                # click / select-all / delete / type-with-delay dance)
+                progress_queue.put((idx, total, f"Typing question {idx}..."))
+                await set_input_text(page, input_element, str(question), config.get("input_method", "dom"))
+
+                # Submit the question
+                progress_queue.put((idx, total, f"Submitting question {idx}..."))
+                submit_method = config.get("submit_method", "enter")
+                if submit_method == "button":
+                    submit_btn = config.get("submit_button_selector")
+                    if submit_btn:
+                        # Compound button union precomputed at config load
+                        button_union = config.get("_button_union") or submit_btn
+
                         try:
-                            await context.close()
-                        except:
-                            pass
-                        results_queue.put(None)
-                        
-            except Exception as browser_error:
+                            await page.wait_for_selector(button_union, timeout=3000, state="visible")
+                            await page.locator(button_union).first.click()
+                            progress_queue.put((idx, total, "Clicked submit button"))
+                        except AsyncPlaywrightTimeoutError:
+                            progress_queue.put((idx, total, "Button not found, trying Enter key..."))
+                            await page.keyboard.press("Enter")
+                    else:
+                        await page.keyboard.press("Enter")
+                else:
+                    await page.keyboard.press("Enter")
+
+                # Wait for response
+                progress_queue.put((idx, total, f"Waiting for response to question {idx}..."))
+                await wait_for_response_async(page, config, idx, total)
+
+                # Extract response
+                progress_queue.put((idx, total, f"Extracting response for question {idx}..."))
+                return await get_response_text_async(page, config, question)
+
+            try:
+                # Retry transient timeouts/flakes with backoff; real bugs
+                # surface immediately instead of being swallowed
+                response_text = await with_retries(attempt)
+
+                end_time = time.time()
+                elapsed = round(end_time - start_time, 2)
+
+                progress_queue.put((idx, total, f"✓ Question {idx}/{total} completed in {elapsed}s"))
+
+                result = (response_text, elapsed)
+
+            except Exception as e:
+                end_time = time.time()
+                elapsed = round(end_time - start_time, 2)
+                error_msg = f"Error: {str(e)}"
                 import traceback
                 error_details = traceback.format_exc()
-                error_msg = f"Failed to launch browser: {str(browser_error)}\nDetails: {error_details[:500]}"
-                progress_queue.put((0, 1, error_msg))
-                results_queue.put(None)
-                return
-        
-        except Exception as e:
+                progress_queue.put((idx, total, f"✗ Question {idx}/{total} failed: {error_msg}"))
+                progress_queue.put((idx, total, f"Error details: {error_details[:200]}"))
+
+                result = (error_msg, elapsed)
+
+            await asyncio.sleep(0.2)  # Small guard before this tab takes its next question
+            return result
+
+async def _run_tests_async(questions, config, llm_site_name, headless, progress_queue, first_run=False):
+    """Run automated tests with async Playwright on the background loop; returns results or None on failure"""
+    try:
+        progress_queue.put((0, len(questions), "Starting browser..."))
+        progress_queue.put((0, len(questions), f"Headless mode: {headless}"))
+
+        # Ensure data directory exists
+        try:
+            os.makedirs(USER_DATA_DIR, exist_ok=True)
+            progress_queue.put((0, len(questions), f"Data directory ready: {USER_DATA_DIR}"))
+        except Exception as dir_error:
+            error_msg = f"Failed to create data directory: {str(dir_error)}"
+            progress_queue.put((0, 1, error_msg))
+            return None
+
+        # Get a browser context from the pool (launches on first use, warm afterwards)
+        try:
+            progress_queue.put((0, len(questions), f"Getting browser for {llm_site_name} (headless={headless})..."))
+            context = await _BROWSER_POOL.acquire(llm_site_name, headless, config.get("block_assets", True))
+            progress_queue.put((0, len(questions), "Browser ready!"))
+        except Exception as browser_error:
             import traceback
             error_details = traceback.format_exc()
-            error_msg = f"Fatal error: {str(e)}\n{error_details[:1000]}"
+            error_msg = f"Failed to launch browser: {str(browser_error)}\nDetails: {error_details[:500]}"
             progress_queue.put((0, 1, error_msg))
-            results_queue.put(None)
-    
-    # Create new event loop for this thread and run async function
-    # Event loop policy is set at module level
-    try:
-        
-        # Create a new event loop with the correct policy
-        # We can't use asyncio.run() here because it checks for existing loops
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+            return None
+
         try:
-            loop.run_until_complete(run_async_tests())
-        finally:
-            loop.close()
-    except RuntimeError as e:
-        # If there's already a loop running, try a different approach
-        if "asyncio.run() cannot be called from a running event loop" in str(e) or "There is no current event loop" in str(e):
-            # Create new loop in this thread
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                loop.run_until_complete(run_async_tests())
-            finally:
-                loop.close()
-        else:
-            raise
+            total = len(questions)
+
+            # Open N pages in the same browser so questions run concurrently.
+            # This workload is I/O-bound (waiting on LLM streaming), so
+            # event-loop concurrency scales until the site rate-limits.
+            concurrency = max(1, min(total, int(config.get("concurrency", 4))))
+
+            # Reuse tabs still parked on the site from a previous run; a warmed
+            # tab skips navigation entirely
+            pages = [pg for pg in context.pages if pg.url.startswith(config["url"])][:concurrency]
+            if pages:
+                progress_queue.put((0, total, f"Reusing {len(pages)} warmed page(s)..."))
+            # On a first run the chat input won't render until the user signs
+            # in, so wait on a login-scale window instead of failing in seconds
+            input_timeout = 300000 if first_run else 15000
+            while len(pages) < concurrency:
+                progress_queue.put((0, total, f"Opening page {len(pages) + 1}/{concurrency} and navigating to {config['url']}..."))
+                page = await context.new_page()
+                # Only the input field needs to exist before we start typing;
+                # "networkidle" stalls for seconds on SPA sites whose analytics
+                # and websockets never go quiet
+                await page.goto(config["url"], wait_until="domcontentloaded", timeout=20000)
+                if first_run:
+                    progress_queue.put((0, total, "Waiting for the chat input - log in in the browser window if prompted..."))
+                await page.wait_for_selector(config.get("_input_union") or config["input_selector"], timeout=input_timeout)
+                pages.append(page)
+            page_locks = [asyncio.Lock() for _ in pages]
+
+            progress_queue.put((0, total, "Page(s) loaded. Starting questions..."))
+
+            # Pre-filter empty rows once with vectorized pandas instead of a
+            # scalar pd.isna check inside every task
+            questions_series = pd.Series(questions, dtype="object").astype("string")
+            valid_mask = (questions_series.notna() & (questions_series.str.strip() != "")).tolist()
+            cleaned = questions_series.str.strip().tolist()
+            valid_indices = [i for i in range(total) if valid_mask[i]]
+            if len(valid_indices) < total:
+                progress_queue.put((0, total, f"Skipping {total - len(valid_indices)} empty question(s)"))
+
+            # Dispatch all questions at once; the semaphore bounds how many
+            # run at a time and each page's lock keeps tasks off each other's tab
+            semaphore = asyncio.Semaphore(concurrency)
+            tasks = [
+                asyncio.create_task(_ask_one_question(
+                    pages[slot % concurrency], page_locks[slot % concurrency], semaphore,
+                    cleaned[i], i + 1, total, config, llm_site_name, progress_queue
+                ))
+                for slot, i in enumerate(valid_indices)
+            ]
+            gathered = await asyncio.gather(*tasks, return_exceptions=True)
+
+            # Fill preallocated column arrays (skipped rows keep their
+            # placeholder); returning columns instead of a list of dicts lets
+            # the UI thread assign the DataFrame without re-iterating results
+            responses = np.full(total, "Empty question skipped", dtype=object)
+            times = np.zeros(total, dtype=np.float64)
+            for i, outcome in zip(valid_indices, gathered):
+                if isinstance(outcome, Exception):
+                    responses[i] = f"Error: {str(outcome)}"
+                else:
+                    responses[i], times[i] = outcome
+
+            # Context stays open in the pool so the next run starts warm
+            progress_queue.put((total, total, "✓ All questions completed!"))
+            return responses, times
+
+        except Exception as nav_error:
+            import traceback
+            error_details = traceback.format_exc()
+            error_msg = f"Error during navigation/execution: {str(nav_error)}\nDetails: {error_details[:500]}"
+            progress_queue.put((0, 1, error_msg))
+            # Don't hand a possibly-broken context to the next run - except on
+            # a first run, where closing it would yank the login window away
+            if not first_run:
+                await _BROWSER_POOL.discard(llm_site_name)
+            return None
+
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
-        error_msg = f"Event loop error: {str(e)}\n{error_details[:1000]}"
+        error_msg = f"Fatal error: {str(e)}\n{error_details[:1000]}"
         progress_queue.put((0, 1, error_msg))
-        results_queue.put(None)
+        return None
+
+class _ProgressChannel:
+    """Thread-safe progress queue that wakes the UI thread when a message arrives
+
+    Lets run_test block on an event instead of spinning every 200ms, so UI
+    updates land as soon as the worker reports progress.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self.event = threading.Event()
+        self.last_error = None
+
+    def put(self, item):
+        # Remember the newest error-looking message as it passes through;
+        # draining empties the queue, so it can't be re-scanned afterwards
+        message = str(item[2]).lower() if len(item) > 2 else ""
+        if "error" in message or "failed" in message or "fatal" in message:
+            self.last_error = item[2]
+        self._queue.put(item)
+        self.event.set()
+
+    def get_nowait(self):
+        return self._queue.get_nowait()
+
+def _drain_progress(progress_queue, progress_bar, status_box):
+    """Drain all queued progress updates and render only the newest one
+
+    Rendering every message forces a widget rerender (and a websocket round
+    trip) per put(); coalescing to the latest keeps the UI current at a
+    fraction of the traffic.
+    """
+    latest = None
+    try:
+        while True:
+            latest = progress_queue.get_nowait()
+    except queue.Empty:
+        pass
+    if latest is not None:
+        idx, total_q, message = latest
+        status_box.update(label=message)
+        if total_q > 0:
+            progress_bar.progress(idx / total_q)
+
+def run_test(questions, config, status_box, llm_site_name):
+    """Run automated tests on the LLM website (submits the coroutine to the background loop)"""
+    # One progress bar inside the status container; label updates ride on the
+    # container instead of replacing a standalone st.empty() element each time
+    progress_bar = status_box.progress(0.0)
 
-def run_test(questions, config, progress_bar, status_text, llm_site_name):
-    """Run automated tests on the LLM website (wrapper that runs in thread)"""
     # Check if login is needed (first time)
     login_key = f"logged_in_{llm_site_name}"
     is_first_run = not st.session_state.get(login_key, False)
-    
+
     if is_first_run:
-        status_text.info("🌐 **First run** - Browser will open for login. After logging in, click the button below.")
-    
-    # Use queues to communicate between threads
-    results_queue = queue.Queue()
-    progress_queue = queue.Queue()
-    
-    # Start the test in a separate thread
+        status_box.update(label="🌐 First run - browser will open for login. After logging in, click the button below.")
+
+    # Progress flows back through a thread-safe channel that wakes this thread
+    progress_queue = _ProgressChannel()
+
+    # Submit the test coroutine to the long-lived background loop
     # For first run, always disable headless so user can see and log in
     headless = st.session_state.get('headless', False) and not is_first_run
-    
-    thread = threading.Thread(
-        target=_run_test_thread,
-        args=(questions, config, llm_site_name, headless, results_queue, progress_queue, login_key),
-        daemon=True
+
+    loop = _get_background_loop()
+    future = asyncio.run_coroutine_threadsafe(
+        _run_tests_async(questions, config, llm_site_name, headless, progress_queue, first_run=is_first_run),
+        loop
     )
-    thread.start()
-    
+
     # Show login confirmation button if first run
     if is_first_run:
         if st.button("✅ I'm logged in - Continue", key="login_confirm", type="primary"):
             st.session_state[login_key] = True
-            status_text.success("✅ Login confirmed! Automation continuing...")
+            status_box.update(label="✅ Login confirmed! Automation continuing...")
             st.rerun()
-    
+
     # Monitor progress and update UI
     total = len(questions)
     max_wait_time = 3600  # Maximum 1 hour wait time
     start_wait = time.time()
-    
-    # Wait for thread to complete, checking progress periodically
-    # First, wait a moment for initial messages
-    time.sleep(0.5)
-    
-    while thread.is_alive() and (time.time() - start_wait) < max_wait_time:
-        # Check for progress updates
-        try:
-            while True:
-                idx, total_q, message = progress_queue.get_nowait()
-                status_text.info(message)
-                if total_q > 0:
-                    progress_bar.progress(idx / total_q)
-        except queue.Empty:
-            pass
-        
-        time.sleep(0.2)  # Small delay to avoid busy waiting
-        thread.join(timeout=0.2)  # Check if thread is done
-    
-    # Get any remaining progress updates
-    try:
-        while True:
-            idx, total_q, message = progress_queue.get_nowait()
-            status_text.info(message)
-            if total_q > 0:
-                progress_bar.progress(idx / total_q)
-    except queue.Empty:
-        pass
-    
-    # Wait a bit more for thread to finish
-    thread.join(timeout=5)
-    
+
+    while not future.done() and (time.time() - start_wait) < max_wait_time:
+        # Sleep until the worker pushes progress (1s heartbeat re-checks the
+        # future); no busy-wait and no fixed poll latency on updates
+        progress_queue.event.wait(timeout=1.0)
+        progress_queue.event.clear()
+        _drain_progress(progress_queue, progress_bar, status_box)
+
     # Get results
     try:
-        # Wait a bit longer for results
-        results = results_queue.get(timeout=10)
-        if results is None:
-            # Get the last error message from progress queue
-            last_error = "Unknown error occurred"
-            try:
-                while True:
-                    idx, total_q, message = progress_queue.get_nowait()
-                    if "error" in message.lower() or "failed" in message.lower() or "fatal" in message.lower():
-                        last_error = message
-            except queue.Empty:
-                pass
-            status_text.error(f"Test run failed: {last_error}")
-            return None
-        progress_bar.progress(1.0)
-        return results
-    except queue.Empty:
-        # Check if thread is still alive
-        if thread.is_alive():
-            status_text.warning("Test run is taking longer than expected. Please wait...")
-            # Try one more time with longer timeout
-            try:
-                results = results_queue.get(timeout=30)
-                if results is None:
-                    status_text.error("Test run failed. Check browser window for details.")
-                    return None
-                progress_bar.progress(1.0)
-                return results
-            except queue.Empty:
-                status_text.error("Test run timed out. The browser may still be running. Please check the browser window.")
-                return None
-        else:
-            status_text.error("Test run completed but no results were returned. Check browser window for errors.")
-            return None
+        results = future.result(timeout=30)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        status_box.update(label="Test run timed out. The browser may still be running. Please check the browser window.", state="error")
+        return None
+    except Exception as e:
+        status_box.update(label=f"Test run failed: {str(e)}", state="error")
+        return None
+
+    # Drain any remaining progress updates
+    _drain_progress(progress_queue, progress_bar, status_box)
+
+    if results is None:
+        # The queue is already drained; the channel kept the last error it saw
+        last_error = progress_queue.last_error or "Unknown error occurred"
+        status_box.update(label=f"Test run failed: {last_error}", state="error")
+        return None
+
+    progress_bar.progress(1.0)
+    return results
 
 # --- Streamlit UI ---
 st.set_page_config(
@@ -684,23 +976,19 @@ if os.environ.get("STREAMLIT_SERVER_PORT") or os.environ.get("STREAMLIT_SHARING_
                - The app will try to auto-install on first run
             """)
 
-# Sidebar for configuration
-with st.sidebar:
-    st.header("⚙️ Configuration")
-    
-    # Load config
-    config = load_config()
-    
-    llm_site = st.selectbox("Select LLM Service", list(config.keys()))
-    site_config = config[llm_site]
-    
-    # Custom LLM Management
+@st.fragment
+def _llm_editor(config):
+    """Custom-LLM editor, fragment-scoped so keystrokes only rerun this subtree"""
     with st.expander("➕ Add/Edit Custom LLM Service"):
         st.caption("Add your own LLM service or edit existing ones")
         
-        # List of existing LLMs
-        existing_llms = list(config.keys())
-        selected_llm_to_edit = st.selectbox("Edit existing LLM (or create new)", ["+ Create New LLM"] + existing_llms, key="llm_editor")
+        # Rebuild the choices list only when the config actually changes,
+        # keyed on a cheap (entry count, file mtime) fingerprint
+        config_fp = (len(config), os.path.getmtime(CONFIG_FILE) if os.path.exists(CONFIG_FILE) else 0)
+        if st.session_state.get("_llm_fp") != config_fp:
+            st.session_state["_llm_choices"] = ["+ Create New LLM", *config.keys()]
+            st.session_state["_llm_fp"] = config_fp
+        selected_llm_to_edit = st.selectbox("Edit existing LLM (or create new)", st.session_state["_llm_choices"], key="llm_editor")
         
         if selected_llm_to_edit == "+ Create New LLM":
             new_llm_name = st.text_input("LLM Service Name", placeholder="e.g., Perplexity, Copilot, etc.", key="new_llm_name")
@@ -709,24 +997,27 @@ with st.sidebar:
             new_llm_name = st.text_input("LLM Service Name", value=selected_llm_to_edit, key="edit_llm_name")
             is_new = False
         
+        # One lookup for the prefill values instead of a nested .get chain per field
+        _defaults = {} if is_new else config.get(selected_llm_to_edit, {})
+        
         if new_llm_name:
             col1, col2 = st.columns(2)
             with col1:
-                new_url = st.text_input("URL", value=config.get(selected_llm_to_edit, {}).get("url", "") if not is_new else "", key="new_url")
+                new_url = st.text_input("URL", value=_defaults.get("url", ""), key="new_url")
             with col2:
-                new_input_selector = st.text_input("Input Selector", value=config.get(selected_llm_to_edit, {}).get("input_selector", "") if not is_new else "", key="new_input")
+                new_input_selector = st.text_input("Input Selector", value=_defaults.get("input_selector", ""), key="new_input")
             
-            new_output_selector = st.text_input("Output Selector", value=config.get(selected_llm_to_edit, {}).get("output_selector", "") if not is_new else "", key="new_output")
+            new_output_selector = st.text_input("Output Selector", value=_defaults.get("output_selector", ""), key="new_output")
             
             col3, col4 = st.columns(2)
             with col3:
-                current_submit = config.get(selected_llm_to_edit, {}).get("submit_method", "enter") if not is_new else "enter"
+                current_submit = _defaults.get("submit_method", "enter")
                 new_submit_method = st.selectbox("Submit Method", ["enter", "button"], index=0 if current_submit == "enter" else 1, key="new_submit_method")
             with col4:
-                new_submit_button = st.text_input("Submit Button Selector (if using button)", value=config.get(selected_llm_to_edit, {}).get("submit_button_selector", "") if not is_new else "", key="new_submit_btn")
+                new_submit_button = st.text_input("Submit Button Selector (if using button)", value=_defaults.get("submit_button_selector") or "", key="new_submit_btn")
             
-            new_wait_selector = st.text_input("Wait Selector (optional - for 'Stop' button)", value=config.get(selected_llm_to_edit, {}).get("wait_selector", "") if not is_new else "", key="new_wait")
-            new_wait_time = st.number_input("Response Wait Time (seconds)", min_value=5, max_value=60, value=config.get(selected_llm_to_edit, {}).get("response_wait_time", 15) if not is_new else 15, key="new_wait_time")
+            new_wait_selector = st.text_input("Wait Selector (optional - for 'Stop' button)", value=_defaults.get("wait_selector") or "", key="new_wait")
+            new_wait_time = st.number_input("Response Wait Time (seconds)", min_value=5, max_value=60, value=_defaults.get("response_wait_time", 15), key="new_wait_time")
             
             col_save, col_delete = st.columns(2)
             with col_save:
@@ -750,7 +1041,7 @@ with st.sidebar:
                         
                         if save_config(config):
                             st.success(f"✅ LLM '{new_llm_name}' saved successfully!")
-                            st.rerun()
+                            st.rerun(scope="app")
                     else:
                         st.error("Please fill in all required fields (Name, URL, Input Selector, Output Selector)")
             
@@ -761,13 +1052,32 @@ with st.sidebar:
                             del config[selected_llm_to_edit]
                             if save_config(config):
                                 st.success(f"✅ LLM '{selected_llm_to_edit}' deleted!")
-                                st.rerun()
+                                st.rerun(scope="app")
                 elif not is_new:
                     st.caption("Default LLMs cannot be deleted")
+
+# Sidebar for configuration
+with st.sidebar:
+    st.header("⚙️ Configuration")
+    
+    # Load config
+    config = load_config()
+    
+    llm_site = st.selectbox("Select LLM Service", list(config.keys()))
+    site_config = config[llm_site]
+    
+    # Custom LLM Management
+    _llm_editor(config)
     
     st.subheader("Browser Settings")
     headless_mode = st.checkbox("Headless Mode", value=False, help="Run browser in background (disable to see automation)")
     st.session_state.headless = headless_mode
+
+    concurrency = st.number_input("Concurrency (parallel tabs)", min_value=1, max_value=8, value=int(site_config.get("concurrency", 4)), help="How many questions to run at once. Lower this if the site rate-limits.")
+    site_config["concurrency"] = int(concurrency)
+
+    block_assets = st.checkbox("Block resources for speed", value=bool(site_config.get("block_assets", True)), help="Skip images, fonts and media during automation - pages look plain but load much faster")
+    site_config["block_assets"] = block_assets
     
     st.subheader("Advanced Settings")
     
@@ -799,61 +1109,36 @@ with st.sidebar:
                 test_status.warning(f"⚠️ Could not auto-install: {str(e)}")
                 test_status.info("💡 Please run `playwright install chromium` manually in Streamlit Cloud console")
         
-        test_status.info("Testing Playwright in background thread...")
-        
-        def test_playwright_thread(result_queue):
-            """Test Playwright in a separate thread with new event loop"""
-            import asyncio
-            import sys
+        test_status.info("Testing Playwright on the background loop...")
+
+        async def test_playwright_async():
+            """Probe the shared Playwright driver with a quick headless navigation"""
             try:
-                # Event loop policy is already set at module level
-                # Create a new event loop for this thread
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                
-                async def test_async():
-                    from playwright.async_api import async_playwright
-                    async with async_playwright() as p:
-                        browser = await p.chromium.launch(headless=True)
-                        page = await browser.new_page()
-                        await page.goto("https://example.com", timeout=10000)
-                        title = await page.title()
-                        await browser.close()
-                    return title
-                
-                title = loop.run_until_complete(test_async())
-                loop.close()
-                result_queue.put(("success", f"✅ Playwright is working! Test page title: {title}"))
+                p = await _get_playwright()
+                browser = await p.chromium.launch(headless=True)
+                page = await browser.new_page()
+                await page.goto("https://example.com", timeout=10000)
+                title = await page.title()
+                await browser.close()
+                return ("success", f"✅ Playwright is working! Test page title: {title}")
             except Exception as e:
                 import traceback
                 error_details = traceback.format_exc()
-                try:
-                    loop.close()
-                except:
-                    pass
-                result_queue.put(("error", f"❌ Playwright test failed: {str(e)}\n\nTry running: python -m playwright install chromium\n\nDetails: {error_details[:500]}"))
-        
-        # Run test in thread
-        test_queue = queue.Queue()
-        test_thread = threading.Thread(target=test_playwright_thread, args=(test_queue,), daemon=True)
-        test_thread.start()
-        
-        # Wait for result
-        import time
-        max_wait = 10
-        start_time = time.time()
-        while test_thread.is_alive() and (time.time() - start_time) < max_wait:
-            time.sleep(0.2)
-            test_thread.join(timeout=0.2)
+                return ("error", f"❌ Playwright test failed: {str(e)}\n\nTry running: python -m playwright install chromium\n\nDetails: {error_details[:500]}")
+
+        # Run test on the persistent background loop shared with the test runs -
+        # no per-click thread or event loop to build and tear down
+        test_future = asyncio.run_coroutine_threadsafe(test_playwright_async(), _get_background_loop())
         
-        # Get result
+        # Block directly on the future - no polling loop, so the result shows
+        # as soon as the probe finishes instead of on the next 0.2s tick
         try:
-            status, message = test_queue.get(timeout=2)
+            status, message = test_future.result(timeout=10)
             if status == "success":
                 test_status.success(message)
             else:
                 test_status.error(message)
-        except queue.Empty:
+        except concurrent.futures.TimeoutError:
             test_status.warning("⏳ Test is taking longer than expected. Playwright may still be installing browsers. Check the terminal for details.")
     
     if st.expander("Edit Selectors (Advanced)"):
@@ -875,73 +1160,103 @@ with st.sidebar:
                 st.rerun()
 
 # Main content area
+@st.cache_data(show_spinner=False, max_entries=8)
+def _load_questions(file_bytes):
+    """Parse uploaded Excel bytes into a DataFrame (cached so reruns skip the parse)"""
+    df = pd.read_excel(io.BytesIO(file_bytes), engine="openpyxl")
+    # Initialize response columns if they don't exist
+    if 'Response' not in df.columns:
+        df['Response'] = ""
+    if 'Time Taken (seconds)' not in df.columns:
+        df['Time Taken (seconds)'] = ""
+    return df
+
+@st.fragment
+def _results_panel():
+    """Results table + download, fragment-scoped so sidebar reruns skip the Arrow resync"""
+    results_df = st.session_state.get("results_df")
+    if results_df is None:
+        return
+    st.subheader("📊 Results")
+    st.dataframe(results_df, width='stretch', height=400)
+
+    # Download button - stream rows into a write-only workbook in memory, which
+    # skips openpyxl's full cell grid (long response strings make that costly)
+    output_filename = f"results_{st.session_state.get('results_site', 'LLM')}_{int(time.time())}.xlsx"
+    excel_buffer = io.BytesIO()
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet("Results")
+    worksheet.append(list(results_df.columns))
+    # openpyxl rejects numpy scalars (np.int64 etc.) and would write NaN as a
+    # literal, so coerce to plain Python values with blanks as None - the same
+    # treatment df.to_excel applied
+    safe_df = results_df.astype(object).where(results_df.notna(), None)
+    for row in safe_df.itertuples(index=False, name=None):
+        worksheet.append([value.item() if isinstance(value, np.generic) else value for value in row])
+    workbook.save(excel_buffer)
+
+    st.download_button(
+        "📥 Download Filled Excel Sheet",
+        excel_buffer.getvalue(),
+        file_name=output_filename,
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+
 uploaded_file = st.file_uploader("📤 Upload Excel File with Questions", type=["xlsx", "xls"])
 
 if uploaded_file:
     try:
-        df = pd.read_excel(uploaded_file)
+        file_bytes = uploaded_file.getvalue()
+        df = _load_questions(file_bytes)
         
         # Check for required columns
         if 'Question' not in df.columns:
             st.error("❌ Excel file must have a 'Question' column!")
             st.stop()
         
-        # Initialize response columns if they don't exist
-        if 'Response' not in df.columns:
-            df['Response'] = ""
-        if 'Time Taken (seconds)' not in df.columns:
-            df['Time Taken (seconds)'] = ""
-        
         st.success(f"✅ Loaded {len(df)} questions from Excel file")
-        st.dataframe(df.head(10), width='stretch')
+
+        # Re-slice the preview only when the uploaded bytes change; reruns
+        # render the kept slice instead of rebuilding it from the DataFrame
+        file_hash = hashlib.blake2b(file_bytes, digest_size=8).hexdigest()
+        if st.session_state.get("_preview_hash") != file_hash:
+            st.session_state["_preview"] = df.head(10)
+            st.session_state["_preview_hash"] = file_hash
+        st.dataframe(st.session_state["_preview"], width='stretch')
         
         if st.button("🚀 Start Browser Test", type="primary"):
             questions = df['Question'].tolist()
             
-            # Progress tracking
-            progress_bar = st.progress(0)
-            status_text = st.empty()
+            # Progress tracking - a single status container batches frontend
+            # updates instead of replacing two standalone elements per message
+            status_box = st.status("Running tests...", expanded=False)
             
             # Run tests
-            results = run_test(questions, site_config, progress_bar, status_text, llm_site)
+            results = run_test(questions, site_config, status_box, llm_site)
             
-            if results:
-                # Update dataframe with results
-                df['Response'] = [r['Response'] for r in results]
-                df['Time Taken (seconds)'] = [r['Time Taken (seconds)'] for r in results]
-                
-                progress_bar.progress(1.0)
-                status_text.success("✅ All tests completed!")
-                
-                # Display results
-                st.subheader("📊 Results")
-                st.dataframe(df, width='stretch', height=400)
+            if results is not None:
+                # Update dataframe with the returned column arrays directly
+                responses, times = results
+                df['Response'] = responses
+                df['Time Taken (seconds)'] = times
                 
-                # Download button
-                output_filename = f"results_{llm_site}_{int(time.time())}.xlsx"
-                excel_buffer = pd.ExcelWriter(output_filename, engine='openpyxl')
-                df.to_excel(excel_buffer, index=False, sheet_name='Results')
-                excel_buffer.close()
-                
-                with open(output_filename, 'rb') as f:
-                    st.download_button(
-                        "📥 Download Filled Excel Sheet",
-                        f.read(),
-                        file_name=output_filename,
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                    )
-                
-                # Clean up
-                if os.path.exists(output_filename):
-                    os.remove(output_filename)
+                status_box.update(label="✅ All tests completed!", state="complete")
+
+                # Stash results; the panel itself renders unconditionally below
+                st.session_state['results_df'] = df
+                st.session_state['results_site'] = llm_site
             else:
                 # Additional error info if run_test returned None
-                status_text.error("❌ Test run was cancelled or failed. Check the status messages above for details. If a browser window opened, check it for any errors or login requirements.")
+                status_box.update(label="❌ Test run was cancelled or failed. Check the status messages above for details. If a browser window opened, check it for any errors or login requirements.", state="error")
                 
     except Exception as e:
         st.error(f"❌ Error reading Excel file: {str(e)}")
         st.exception(e)
 
+# Rendered on every run (not just the one where the button was pressed) so
+# stored results survive reruns and sidebar interaction stays in the fragment
+_results_panel()
+
 # Instructions
 with st.expander("📖 How to Use"):
     st.markdown("""
@@ -2,7 +2,7 @@
 Script to create an example Excel file for testing
 Run this after installing dependencies: python create_example.py
 """
-import pandas as pd
+from openpyxl import Workbook
 
 # Create example questions
 questions = [
@@ -18,15 +18,13 @@ questions = [
     "What is overfitting in machine learning?"
 ]
 
-# Create DataFrame
-df = pd.DataFrame({
-    'Question': questions,
-    'Response': [''] * len(questions),
-    'Time Taken (seconds)': [''] * len(questions)
-})
-
-# Save to Excel
-df.to_excel('example_questions.xlsx', index=False)
+# Save to Excel - a write-only workbook streams rows straight to disk without
+# pulling in pandas just to build a 10-row sheet
+workbook = Workbook(write_only=True)
+worksheet = workbook.create_sheet("Sheet1")
+worksheet.append(['Question', 'Response', 'Time Taken (seconds)'])
+for question in questions:
+    worksheet.append([question, '', ''])
+workbook.save('example_questions.xlsx')
 print("Example Excel file 'example_questions.xlsx' created successfully!")
 print(f"   Contains {len(questions)} sample questions")
-
@@ -5,9 +5,34 @@ This runs automatically when the app starts
 import os
 import subprocess
 import sys
+from pathlib import Path
+
+# Sentinel touched after a successful probe/install so warm starts skip the
+# ~200ms sync_playwright() startup entirely. Playwright's bundle directory
+# differs per OS, so resolve it the same way the driver does.
+if os.environ.get("PLAYWRIGHT_BROWSERS_PATH"):
+    _BROWSERS_DIR = Path(os.environ["PLAYWRIGHT_BROWSERS_PATH"])
+elif sys.platform == "win32":
+    _BROWSERS_DIR = Path(os.environ.get("LOCALAPPDATA", str(Path.home() / "AppData" / "Local"))) / "ms-playwright"
+elif sys.platform == "darwin":
+    _BROWSERS_DIR = Path.home() / "Library" / "Caches" / "ms-playwright"
+else:
+    _BROWSERS_DIR = Path.home() / ".cache" / "ms-playwright"
+_INSTALLED_SENTINEL = _BROWSERS_DIR / ".installed_ok"
+
+def _mark_installed():
+    """Record on disk that browsers are known-good"""
+    try:
+        _INSTALLED_SENTINEL.parent.mkdir(parents=True, exist_ok=True)
+        _INSTALLED_SENTINEL.touch()
+    except OSError:
+        pass
 
 def install_playwright_browsers():
     """Install Playwright browsers if not already installed"""
+    # Short-circuit on warm starts - a previous run already verified the install
+    if _INSTALLED_SENTINEL.exists():
+        return True
     try:
         # Check if browsers are already installed
         from playwright.sync_api import sync_playwright
@@ -17,10 +42,11 @@ def install_playwright_browsers():
                 browser_path = p.chromium.executable_path
                 if os.path.exists(browser_path):
                     print("✅ Playwright browsers already installed")
+                    _mark_installed()
                     return True
-            except:
+            except Exception:
                 pass
-        
+
         # Browsers not installed, install them
         print("📦 Installing Playwright browsers...")
         result = subprocess.run(
@@ -28,9 +54,10 @@ def install_playwright_browsers():
             capture_output=True,
             text=True
         )
-        
+
         if result.returncode == 0:
             print("✅ Playwright browsers installed successfully")
+            _mark_installed()
             return True
         else:
             print(f"❌ Error installing browsers: {result.stderr}")
@@ -45,4 +72,3 @@ if __name__ != "__main__":
     # Only run in Streamlit Cloud environment
     if os.environ.get("STREAMLIT_SERVER_PORT") or os.environ.get("STREAMLIT_SHARING_MODE"):
         install_playwright_browsers()
-